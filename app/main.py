@@ -1,3 +1,5 @@
+import os
+
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.responses import HTMLResponse
 from fastapi.templating import Jinja2Templates
@@ -22,13 +24,14 @@ queue = Queue(connection=redis_conn)
 embedding_model = SentenceTransformer(settings.embedding_model_name)
 client = OpenAI(api_key=settings.openai_api_key)
 
-# Setup templates for simple frontend
-templates = Jinja2Templates(directory="templates")
+# Setup templates for simple frontend (resolve relative to this file so the
+# app works regardless of the working directory)
+templates = Jinja2Templates(directory=os.path.join(os.path.dirname(__file__), "templates"))
 
 @app.get("/", response_class=HTMLResponse)
 def get_ui(request: Request):
     """Serve the single-page frontend."""
-    return templates.TemplateResponse("index.html", {"request": request})
+    return templates.TemplateResponse(request, "index.html")
 
 def obj_id(id_str: str) -> ObjectId:
     try:
@@ -1,23 +1,124 @@
 import pytest
 import os
 import sys
-from unittest.mock import Mock, patch, MagicMock
-from fastapi.testclient import TestClient
+from contextlib import ExitStack
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
 import fakeredis
 from bson import ObjectId
 
+# One ObjectId for the whole suite; generating a fresh one per fixture
+# instantiation buys nothing
+_SAMPLE_OID = ObjectId()
+_SAMPLE_OID_STR = str(_SAMPLE_OID)
+
 # Set environment variables for testing
 os.environ.setdefault('OPENAI_API_KEY', 'test-api-key')
 os.environ.setdefault('MONGO_HOST', 'test-mongo')
 os.environ.setdefault('REDIS_HOST', 'test-redis')
 os.environ.setdefault('CHROMA_HOST', 'test-chroma')
 
-@pytest.fixture
-def mock_redis():
-    """Mock Redis connection using fakeredis."""
+def pytest_addoption(parser):
+    parser.addoption("--runslow", action="store_true", default=False,
+                     help="run tests marked as slow")
+
+def pytest_configure(config):
+    # pytest.ini's [tool:pytest] section is ignored by pytest, so register
+    # the marker here where it is guaranteed to take effect
+    config.addinivalue_line(
+        "markers",
+        "slow: marks tests that drive full request/task flows (run with --runslow)")
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--runslow"):
+        return
+    skip_slow = pytest.mark.skip(reason="need --runslow option to run")
+    for item in items:
+        if "slow" in item.keywords:
+            item.add_marker(skip_slow)
+
+@pytest.fixture(scope="session", autouse=True)
+def _patch_externals():
+    """Patch every external service client once and import the app modules a
+    single time, so no test pays the real client/model construction cost."""
+    with ExitStack() as stack:
+        mocks = SimpleNamespace(
+            chroma=stack.enter_context(patch('chromadb.HttpClient')),
+            mongo=stack.enter_context(patch('pymongo.MongoClient')),
+            redis=stack.enter_context(patch('redis.Redis')),
+            sentence_transformer=stack.enter_context(patch('sentence_transformers.SentenceTransformer')),
+            openai=stack.enter_context(patch('openai.OpenAI')),
+            queue=stack.enter_context(patch('rq.Queue')),
+        )
+        # Drop any stale entries (e.g. module stubs installed at collection
+        # time) so db/main/tasks are imported exactly once, under the patches.
+        for name in ('main', 'tasks', 'db'):
+            sys.modules.pop(name, None)
+        import db  # noqa: F401
+        import main  # noqa: F401 — also imports tasks
+        yield mocks
+
+@pytest.fixture(scope="session")
+def default_settings():
+    """One Settings instance built from defaults (plus the required API key).
+
+    The test env vars set above are removed for the construction so the
+    instance really carries the documented defaults.
+    """
+    from config import Settings
+    with pytest.MonkeyPatch.context() as mp:
+        for var in ('MONGO_HOST', 'REDIS_HOST', 'CHROMA_HOST'):
+            mp.delenv(var, raising=False)
+        mp.setenv('OPENAI_API_KEY', 'test-key')
+        return Settings()
+
+@pytest.fixture(scope="session")
+def _fake_redis_singleton():
+    """One FakeRedis for the whole session; construction is not free."""
     return fakeredis.FakeRedis()
 
 @pytest.fixture
+def mock_redis(_fake_redis_singleton):
+    """Mock Redis connection using fakeredis, flushed after each test."""
+    yield _fake_redis_singleton
+    _fake_redis_singleton.flushall()
+
+@pytest.fixture
+def tasks_env(mocker):
+    """Patch tasks' collaborators in one place with reasonable defaults;
+    tests override only the value that distinguishes their scenario."""
+    env = SimpleNamespace(
+        httpx=mocker.patch('tasks.httpx.get'),
+        extract=mocker.patch('tasks.trafilatura.extract'),
+        openai=mocker.patch('tasks.client'),
+        db=mocker.patch('tasks.db'),
+        collection=mocker.patch('tasks.collection'),
+        embedding=mocker.patch('tasks.embedding_model'),
+        job=mocker.patch('tasks.get_current_job'),
+    )
+    env.httpx.return_value = SimpleNamespace(
+        text="<html>Test content</html>", raise_for_status=lambda: None
+    )
+    env.extract.return_value = "Extracted content"
+    env.embedding.encode.return_value = SimpleNamespace(tolist=lambda: [0.1] * 384)
+    env.db.documents.insert_one.return_value = SimpleNamespace(inserted_id=_SAMPLE_OID)
+    return env
+
+@pytest.fixture(autouse=True)
+def _reset_mocks(request):
+    """Clear call history on any session-scoped mock a test pulled in."""
+    yield
+    for name in ('mock_mongo_db', 'mock_chroma_collection',
+                 'mock_embedding_model', 'mock_openai_client'):
+        if name in request.fixturenames:
+            request.getfixturevalue(name).reset_mock()
+
+@pytest.fixture(scope="session")
+def sample_oid_str():
+    """The suite-wide sample ObjectId as a string; built once, not per test."""
+    return _SAMPLE_OID_STR
+
+@pytest.fixture(scope="session")
 def mock_mongo_db():
     """Mock MongoDB database."""
     mock_db = Mock()
@@ -25,13 +126,13 @@ def mock_mongo_db():
     mock_db.documents = mock_collection
     return mock_db
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def mock_chroma_collection():
     """Mock ChromaDB collection."""
     mock_collection = Mock()
     mock_collection.query.return_value = {
         "metadatas": [[{
-            "mongo_id": str(ObjectId()),
+            "mongo_id": _SAMPLE_OID_STR,
             "chunk_key": "content",
             "source_url": "https://example.com"
         }]]
@@ -39,14 +140,14 @@ def mock_chroma_collection():
     mock_collection.count.return_value = 100
     return mock_collection
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def mock_embedding_model():
     """Mock SentenceTransformer model."""
     mock_model = Mock()
     mock_model.encode.return_value = [0.1] * 384  # Mock embedding vector
     return mock_model
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def mock_openai_client():
     """Mock OpenAI client."""
     mock_client = Mock()
@@ -56,7 +157,7 @@ def mock_openai_client():
     mock_client.chat.completions.create.return_value = mock_response
     return mock_client
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def mock_settings():
     """Mock settings object."""
     settings = Mock()
@@ -73,11 +174,11 @@ def mock_settings():
     settings.top_k = 5
     return settings
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_document():
     """Sample document for testing."""
     return {
-        "_id": ObjectId(),
+        "_id": _SAMPLE_OID,
         "url": "https://example.com",
         "data": {
             "title": "Test Article",
@@ -3,30 +3,28 @@ import os
 from unittest.mock import patch
 from pydantic import ValidationError
 
+from config import Settings
+
 class TestSettings:
-    
-    def test_default_settings(self):
+
+    def test_default_settings(self, default_settings):
         """Test default configuration values."""
-        with patch.dict(os.environ, {'OPENAI_API_KEY': 'test-key'}):
-            from config import Settings
-            settings = Settings()
-            
-            assert settings.mongo_host == "mongodb"
-            assert settings.mongo_port == 27017
-            assert settings.redis_host == "redis"
-            assert settings.redis_port == 6379
-            assert settings.chroma_host == "chromadb"
-            assert settings.chroma_port == 8000
-            assert settings.embedding_model_name == "all-MiniLM-L6-v2"
-            assert settings.nano_model_name == "gpt-4.1-nano"
-            assert settings.rag_model_name == "gpt-4.1-nano"
-            assert settings.top_k == 5
-            assert settings.openai_api_key == "test-key"
-    
+        settings = default_settings
+
+        assert settings.mongo_host == "mongodb"
+        assert settings.mongo_port == 27017
+        assert settings.redis_host == "redis"
+        assert settings.redis_port == 6379
+        assert settings.chroma_host == "chromadb"
+        assert settings.chroma_port == 8000
+        assert settings.embedding_model_name == "all-MiniLM-L6-v2"
+        assert settings.nano_model_name == "gpt-4.1-nano"
+        assert settings.rag_model_name == "gpt-4.1-nano"
+        assert settings.top_k == 5
+        assert settings.openai_api_key == "test-key"
+
     def test_custom_settings(self):
         """Test configuration with custom values."""
-        from config import Settings
-        
         settings = Settings(
             mongo_host="custom-mongo",
             mongo_port=27018,
@@ -63,7 +61,6 @@ class TestSettings:
         }
         
         with patch.dict(os.environ, env_vars):
-            from config import Settings
             settings = Settings()
             
             assert settings.mongo_host == "env-mongo"
@@ -78,8 +75,6 @@ class TestSettings:
             if 'OPENAI_API_KEY' in os.environ:
                 del os.environ['OPENAI_API_KEY']
             
-            from config import Settings
-            
             with pytest.raises(ValidationError) as exc_info:
                 Settings()
             
@@ -89,8 +84,6 @@ class TestSettings:
     
     def test_type_validation(self):
         """Test that type validation works correctly."""
-        from config import Settings
-        
         # Test invalid port (should be int)
         with pytest.raises(ValidationError):
             Settings(mongo_port="invalid", openai_api_key="test-key")
@@ -101,8 +94,6 @@ class TestSettings:
     
     def test_config_class(self):
         """Test that Config class specifies .env file."""
-        from config import Settings
-        
         # Check that Config class exists and has env_file attribute
         assert hasattr(Settings, 'Config')
         assert hasattr(Settings.Config, 'env_file')